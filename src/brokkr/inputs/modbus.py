@@ -3,6 +3,7 @@ Data input from devices using the Modbus protocol.
 """
 
 # Standard library imports
+import os.path
 import struct
 
 # Third party imports
@@ -19,6 +20,12 @@ import brokkr.utils.ports
 MODBUS_COIL_TYPE = "?"
 MODBUS_REGISTER_TYPE = "H"
 
+# Most values that may be read in one request, per the Modbus spec
+MODBUS_MAX_COUNT = {
+    MODBUS_COIL_TYPE: 2000,
+    MODBUS_REGISTER_TYPE: 125,
+    }
+
 MODBUS_SERIAL_KWARGS_DEFAULT = {
     "method": "rtu",
     "strict": False,
@@ -26,6 +33,13 @@ MODBUS_SERIAL_KWARGS_DEFAULT = {
     }
 
 
+def split_request_range(start_address, count, max_count):
+    """Split a range of addresses into as few max-size requests as possible."""
+    return [(address, min(max_count, start_address + count - address))
+            for address in range(start_address, start_address + count,
+                                 max_count)]
+
+
 class ModbusInput(brokkr.pipeline.baseinput.ValueInputStep):
     def __init__(
             self,
@@ -36,6 +50,7 @@ class ModbusInput(brokkr.pipeline.baseinput.ValueInputStep):
             modbus_kwargs=None,
             datatype_default_kwargs=None,
             binary_decoder=True,
+            cache_client=True,
             **value_input_kwargs):
         """
         Class to read data from an attached Modbus device.
@@ -49,6 +64,10 @@ class ModbusInput(brokkr.pipeline.baseinput.ValueInputStep):
         modbus_params
             Parameters to pass to the modbus client being used.
             If modbus_client is serial, will use sensible defaults.
+        cache_client : bool, optional
+            Keep the client connected between reads instead of opening
+            and closing it every time, reconnecting only after an error.
+            The default is True.
 
         """
         if datatype_default_kwargs is None:
@@ -64,75 +83,111 @@ class ModbusInput(brokkr.pipeline.baseinput.ValueInputStep):
 
         self._start_address = start_address
         self._unit = unit
+        # Number of registers or coils to request; fixed by the data types
+        if self._raw_type == MODBUS_REGISTER_TYPE:
+            self._responce_count = (
+                self.decoder.packet_size
+                // struct.calcsize("!" + MODBUS_REGISTER_TYPE))
+        else:
+            self._responce_count = len(self.data_types)
+        self._request_ranges = split_request_range(
+            start_address=self._start_address,
+            count=self._responce_count,
+            max_count=MODBUS_MAX_COUNT[self._raw_type],
+            )
+        self._raw_struct = struct.Struct(
+            "!" + self._raw_type * self._responce_count)
 
         self._modbus_class = getattr(pymodbus.client.sync, modbus_client)
         self._modbus_function = modbus_command
         self._modbus_kwargs = {} if modbus_kwargs is None else modbus_kwargs
+        self._cache_client = cache_client
+        self._modbus_client = None
+        self._modbus_client_kwargs = None
 
     def _handle_failed_connect(self, error, modbus_client, port_object):
         # pylint: disable=unused-argument, no-self-use
         return False
 
-    def _get_responce_data(self, modbus_client, port_object=None):
-        if self._raw_type == MODBUS_REGISTER_TYPE:
-            responce_count = (
-                self.decoder.packet_size
-                // struct.calcsize("!" + MODBUS_REGISTER_TYPE))
-        else:
-            responce_count = len(self.data_types)
+    def _get_modbus_client(self):
+        # Reuse the cached client unless its settings (e.g. port) changed
+        if self._modbus_client is not None:
+            if self._modbus_client_kwargs == self._modbus_kwargs:
+                return self._modbus_client
+            self._close_modbus_client(self._modbus_client)
+
+        modbus_client = self._modbus_class(**self._modbus_kwargs)
+        if self._cache_client:
+            self._modbus_client = modbus_client
+            self._modbus_client_kwargs = {**self._modbus_kwargs}
+        return modbus_client
+
+    def _close_modbus_client(self, modbus_client, port_object=None):
+        # Drop the client from the cache so the next read reconnects
+        if modbus_client is self._modbus_client:
+            self._modbus_client = None
+            self._modbus_client_kwargs = None
+
+        self.logger.debug("Closing Modbus client connection")
         try:
-            responce_data = getattr(modbus_client, self._modbus_function)(
-                address=self._start_address,
-                count=responce_count,
-                unit=self._unit)
-            # If modbus data is an exception, log it and return None
-            if isinstance(responce_data, BaseException):
-                raise responce_data
-            if isinstance(responce_data, pymodbus.pdu.ExceptionResponse):
-                self.logger.error("Error reading Modbus data for %s",
-                                  port_object)
-                self.log_helper.log(error=responce_data, client=modbus_client,
-                                    port=port_object)
-                return None
+            modbus_client.close()
+        # Catch and log any errors closing the modbus connection
+        except AttributeError:
+            self.logger.debug(
+                "Modbus client of type %r lacks close method; skipping",
+                brokkr.utils.misc.get_full_class_name(modbus_client))
+        except Exception as e:
+            self.logger.warning("%s closing modbus device at %s: %s",
+                                type(e).__name__, port_object, e)
+            self.log_helper.log(client=modbus_client, port=port_object)
+
+    def _get_responce_data(
+            self, modbus_client, port_object=None, error_level="error"):
+        connection_ok = False
+        responce_data = None
+        try:
+            # Reads too large for one request are split and joined back up
+            for address, count in self._request_ranges:
+                responce_part = getattr(modbus_client, self._modbus_function)(
+                    address=address, count=count, unit=self._unit)
+                # If modbus data is an exception, log it and return None
+                if isinstance(responce_part, BaseException):
+                    raise responce_part
+                if isinstance(responce_part, pymodbus.pdu.ExceptionResponse):
+                    # The device replied, so the connection can be kept
+                    connection_ok = True
+                    self.logger.error("Error reading Modbus data for %s",
+                                      port_object)
+                    self.log_helper.log(
+                        error=responce_part, client=modbus_client,
+                        port=port_object)
+                    return None
+                if responce_data is None:
+                    responce_data = responce_part
+                elif self._raw_type == MODBUS_REGISTER_TYPE:
+                    responce_data.registers += responce_part.registers
+                else:
+                    responce_data.bits += responce_part.bits
+            # Only keep the connection if every part was read successfully
+            connection_ok = True
         # Catch and log errors reading modbus data
         except Exception as e:
-            self.logger.error("%s reading Modbus data for %s: %s",
-                              type(e).__name__, port_object, e)
+            getattr(self.logger, error_level)(
+                "%s reading Modbus data for %s: %s",
+                type(e).__name__, port_object, e)
             self.log_helper.log(client=modbus_client, port=port_object)
             return None
         finally:
-            self.logger.debug("Closing Modbus client connection")
-            try:
-                modbus_client.close()
-            # Catch and log any errors closing the modbus connection
-            except AttributeError:
-                self.logger.debug(
-                    "Modbus client of type %r lacks close method; skipping",
-                    brokkr.utils.misc.get_full_class_name(modbus_client))
-            except Exception as e:
-                self.logger.warning("%s closing modbus device at %s: %s",
-                                    type(e).__name__, port_object, e)
-                self.log_helper.log(client=modbus_client, port=port_object)
+            if not (self._cache_client and connection_ok):
+                self._close_modbus_client(
+                    modbus_client=modbus_client, port_object=port_object)
 
         return responce_data
 
-    def _read_modbus_data(self, port_object=None):
-        """
-        Read data from an attached Modbus device.
-
-        Parameters
-        ----------
-        None.
-
-        Returns
-        -------
-        responce_data : pymodbbus Responce
-            Pymodbus data object reprisenting the read data,
-            or None if no data could be read and an exception was logged.
-
-        """
+    def _read_modbus_client_data(
+            self, port_object=None, error_level="error"):
         # Read data over Modbus
-        modbus_client = self._modbus_class(**self._modbus_kwargs)
+        modbus_client = self._get_modbus_client()
         self.log_helper.log("debug", error=False, client=modbus_client)
         try:
             try:
@@ -149,25 +204,67 @@ class ModbusInput(brokkr.pipeline.baseinput.ValueInputStep):
                     raise
             if connect_successful:
                 modbus_data = self._get_responce_data(
-                    modbus_client=modbus_client)
+                    modbus_client=modbus_client, port_object=port_object,
+                    error_level=error_level)
             else:
                 # Raise an error if connect not successful
-                self.logger.error(
+                getattr(self.logger, error_level)(
                     "Error reading modbus data: Cannot connect to device %s",
                     port_object)
                 self.log_helper.log(
                     error=False, client=modbus_client, port=port_object)
+                self._close_modbus_client(
+                    modbus_client=modbus_client, port_object=port_object)
                 return None
             self.logger.debug("Responce data: %r",
                               getattr(modbus_data, "__dict__", None))
         except Exception as e:
-            self.logger.error("%s connecting to Modbus device at %s: %s",
-                              type(e).__name__, port_object, e)
+            getattr(self.logger, error_level)(
+                "%s connecting to Modbus device at %s: %s",
+                type(e).__name__, port_object, e)
             self.log_helper.log(client=modbus_client, port=port_object)
+            self._close_modbus_client(
+                modbus_client=modbus_client, port_object=port_object)
             return None
 
         return modbus_data
 
+    def _read_modbus_data(self, port_object=None):
+        """
+        Read data from an attached Modbus device.
+
+        Parameters
+        ----------
+        None.
+
+        Returns
+        -------
+        responce_data : pymodbbus Responce
+            Pymodbus data object reprisenting the read data,
+            or None if no data could be read and an exception was logged.
+
+        """
+        reused_client = (
+            self._modbus_client is not None
+            and self._modbus_client_kwargs == self._modbus_kwargs)
+        # Failures on a cached connection are retried, so are less severe
+        modbus_data = self._read_modbus_client_data(
+            port_object=port_object,
+            error_level="info" if reused_client else "error",
+            )
+
+        # If a cached connection failed and was dropped, it may just have
+        # gone stale since the last read, so retry once on a fresh one
+        if (modbus_data is None and reused_client
+                and self._modbus_client is None):
+            self.logger.info(
+                "Retrying Modbus read for %s with a new connection",
+                port_object)
+            modbus_data = self._read_modbus_client_data(
+                port_object=port_object)
+
+        return modbus_data
+
     def read_raw_data(self, input_data=None):
         modbus_data = self._read_modbus_data()
 
@@ -189,11 +286,15 @@ class ModbusInput(brokkr.pipeline.baseinput.ValueInputStep):
                     # Coil responce length is rounded up to the nearest byte
                     raw_data = raw_data[:len(self.data_types)]
 
-                struct_format = "!" + self._raw_type * len(raw_data)
-                raw_data = struct.pack(struct_format, *raw_data)
+                # Use the precompiled struct unless the length is unexpected
+                raw_struct = self._raw_struct
+                if len(raw_data) != self._responce_count:
+                    raw_struct = struct.Struct(
+                        "!" + self._raw_type * len(raw_data))
+                raw_data = raw_struct.pack(*raw_data)
                 self.logger.debug(
                     "Converted Modbus responce to struct of format %r: %r",
-                    struct_format, raw_data)
+                    raw_struct.format, raw_data)
         else:
             raw_data = None
 
@@ -229,6 +330,7 @@ class ModbusSerialInput(ModbusInput):
         self._serial_port = serial_port
         self._serial_pids = [] if serial_pids is None else serial_pids
         self._try_usb_reset = try_usb_reset
+        self._port_object = None
 
     def _handle_failed_connect(
             self, error, modbus_client=None, port_object=None):
@@ -249,7 +351,12 @@ class ModbusSerialInput(ModbusInput):
         return connect_successful
 
     def _read_modbus_data(self, port_object=None):
-        # Get serial port to use from port list
+        # Reuse the connected client's port while its device node is present
+        if (not port_object and self._modbus_client is not None
+                and self._port_object is not None
+                and os.path.exists(self._port_object.device)):
+            port_object = self._port_object
+        # Otherwise, get serial port to use from port list
         if not port_object:
             port_list = serial.tools.list_ports.comports()
             port_object = brokkr.utils.ports.get_serial_port(
@@ -259,6 +366,7 @@ class ModbusSerialInput(ModbusInput):
                 )
         if not port_object:
             return None
+        self._port_object = port_object
 
         self._modbus_kwargs["port"] = port_object.device
         modbus_data = super()._read_modbus_data(port_object=port_object)
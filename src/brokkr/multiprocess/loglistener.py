@@ -12,13 +12,15 @@ import time
 import unittest.mock
 
 # Local imports
-from brokkr.constants import SLEEP_TICK_S
 import brokkr.utils.misc
 
 
 # Value to use to shut down the logging system
 LogShutdownSentinel = unittest.mock.sentinel.LogShutdownSentinel
 
+# Loggers are never destroyed, so they can be looked up once and reused
+_LOGGER_CACHE = {}
+
 
 # --- Logging setup functions --- #
 
@@ -63,52 +65,79 @@ def shutdown_log_listener(log_queue):
     logging.shutdown()
 
 
-def handle_queued_log_record(log_queue, outer_exit_event=None):
-    logger = logging.getLogger(__name__)
-    log_record = None
-
+def handle_log_record(log_record):
     try:
-        log_record = log_queue.get(block=True, timeout=SLEEP_TICK_S)
-    except (queue.Empty, InterruptedError):
-        pass  # If the queue is empty or interrupted, just try again
-    except Exception as e:  # If an error occurs, log and move on
-        logger.error("%s getting from queue %s: %s",
-                     type(e).__name__, log_queue, e)
+        try:
+            record_logger = _LOGGER_CACHE[log_record.name]
+        except KeyError:
+            record_logger = logging.getLogger(log_record.name)
+            _LOGGER_CACHE[log_record.name] = record_logger
+        record_logger.handle(log_record)
+    except Exception as e:  # If an error occurs logging, log and move on
+        logger = logging.getLogger(__name__)
+        logger.warning("%s logging record %s: %s",
+                       type(e).__name__, log_record, e)
         logger.info("Error details:", exc_info=True)
-    else:
-        if log_record is LogShutdownSentinel:
-            if outer_exit_event is not None:
-                outer_exit_event.set()
+        logger.info("Log record details: %r", log_record)
 
-            shutdown_log_listener(log_queue=log_queue)
 
-            if outer_exit_event is None:
-                raise StopIteration
-            return None
+class LogQueueListener(logging.handlers.QueueListener):
+    """Handle records from the queue in a thread until told to shut down."""
 
-        try:
-            record_logger = logging.getLogger(log_record.name)
-            record_logger.handle(log_record)
-        except Exception as e:  # If an error occurs logging, log and move on
-            logger.warning("%s logging record %s: %s",
-                           type(e).__name__, log_record, e)
-            logger.info("Error details:", exc_info=True)
-            logger.info("Log record details: %r", log_record)
-        return log_record
+    def __init__(self, log_queue, outer_exit_event):
+        super().__init__(log_queue)
+        self.outer_exit_event = outer_exit_event
 
-    return log_record
+    def dequeue(self, block):
+        while True:
+            try:
+                record = super().dequeue(block)
+            except queue.Empty:
+                raise
+            except InterruptedError:
+                continue  # If the queue is interrupted, just try again
+            except Exception as e:  # If an error occurs, log and move on
+                logger = logging.getLogger(__name__)
+                logger.error("%s getting from queue %s: %s",
+                             type(e).__name__, self.queue, e)
+                logger.info("Error details:", exc_info=True)
+                continue
+            # Stop the thread here, leaving any later records in the queue
+            if record is LogShutdownSentinel:
+                self.outer_exit_event.set()
+                return self._sentinel
+            return record
+
+    def handle(self, record):
+        handle_log_record(record)
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
 
 
 def run_log_listener(log_queue, log_configurator,
                      configurator_kwargs=None, exit_event=None):
     if configurator_kwargs is None:
         configurator_kwargs = {}
+    if exit_event is None:
+        exit_event = multiprocessing.Event()
     log_configurator(**configurator_kwargs)
     logger = logging.getLogger(__name__)
     logger.info("Starting logging system")
     outer_exit_event = multiprocessing.Event()
 
-    brokkr.utils.misc.run_periodic(
-        handle_queued_log_record, exit_event=exit_event,
-        outer_exit_event=outer_exit_event, logger=False)(
-            log_queue, outer_exit_event=outer_exit_event)
+    # Signals set the exit event, but logging continues until shut down
+    brokkr.utils.misc.set_signal_handler(
+        brokkr.utils.misc.generate_quit_handler(exit_event, logger=False))
+
+    log_listener = LogQueueListener(
+        log_queue, outer_exit_event=outer_exit_event)
+    log_listener.start()
+    # Block until the listener thread exits on receiving the shutdown sentinel
+    log_listener.join()
+    if not outer_exit_event.is_set():
+        logger.critical("Log listener thread stopped unexpectedly")
+
+    shutdown_log_listener(log_queue=log_queue)
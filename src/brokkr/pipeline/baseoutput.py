@@ -43,8 +43,9 @@ class FileOutputStep(brokkr.pipeline.base.OutputStep, metaclass=abc.ABCMeta):
         if self.key_name:
             data_obj = brokkr.pipeline.utils.get_data_object(
                 input_data, key_name=self.key_name)
-            timestamp = getattr(
-                data_obj, "timestamp", datetime.datetime.utcnow())
+            timestamp = getattr(data_obj, "timestamp", None)
+            if timestamp is None:
+                timestamp = datetime.datetime.utcnow()
             self.filename_kwargs["created_datetime"] = timestamp
             self.filename_kwargs["created_ms"] = timestamp.microsecond // 1000
         for datavalue_key in self.filename_datavalues:
@@ -6,6 +6,7 @@ Common decode and conversion functionality.
 import ast
 import collections.abc
 import datetime
+import functools
 import logging
 import math
 import operator
@@ -53,6 +54,12 @@ def eval_oneshot(expression, **simpleeval_kwargs):
     return eval_result
 
 
+@functools.lru_cache(maxsize=None)
+def _get_cached_eval_parser():
+    # Reused across polls, as building a parser each time dominates eval cost
+    return generate_eval_parser()
+
+
 # --- Conversion functions --- #
 
 def _convert_none(value):
@@ -64,18 +71,6 @@ def _convert_pass(value):
     return value
 
 
-def _convert_bitfield(value):
-    return int(value)
-
-
-def _convert_bool(value):
-    return bool(value)
-
-
-def _convert_bytes(value):
-    return bytes(value)
-
-
 def _convert_bytestr(value, encoding="utf-8"):
     return value.decode(encoding)
 
@@ -85,18 +80,6 @@ def _convert_bytestr_strip(
     return value.decode(encoding).strip(strip_chars)
 
 
-def _convert_float(value):
-    return float(value)
-
-
-def _convert_int(value, **kwargs):
-    return int(value, **kwargs)
-
-
-def _convert_str(value):
-    return str(value)
-
-
 def _convert_time_posix(
         value, multiplier_to_s=1, divisor_to_s=1,
         use_local=False, strip_tz=False):
@@ -124,20 +107,22 @@ def _convert_custom(value, base=2, power=0, scale=1, offset=0):
 
 
 def _convert_eval(value, expression):
-    return eval_oneshot(names={"value": value}, expression=expression)
+    value_parser = _get_cached_eval_parser()
+    value_parser.names = {"value": value}
+    return value_parser.eval(expression)
 
 
 CONVERSION_FUNCTIONS = {
     False: _convert_none,
     True: _convert_pass,
-    "bitfield": _convert_bitfield,
-    "bool": _convert_bool,
-    "bytes": _convert_bytes,
+    "bitfield": int,
+    "bool": bool,
+    "bytes": bytes,
     "bytestr": _convert_bytestr,
     "bytestr_strip": _convert_bytestr_strip,
-    "float": _convert_float,
-    "int": _convert_int,
-    "str": _convert_str,
+    "float": float,
+    "int": int,
+    "str": str,
     "time_posix": _convert_time_posix,
     "timestamp": _convert_timestamp,
     "custom": _convert_custom,
@@ -189,11 +174,24 @@ class DataDecoder(brokkr.utils.misc.AutoReprMixin):
         self.na_marker = NA_MARKER_DEFAULT if na_marker is None else na_marker
         if conversion_functions is None:
             conversion_functions = {}
-        conversion_functions = {
+        self.conversion_functions = {
             **self.conversion_functions, **conversion_functions}
         self.include_all_data_each = include_all_data_each
         self.passthrough_none = passthrough_none
 
+        # Data types without a conversion are dropped, so skip them up front
+        self._output_data_types = [
+            (idx, data_type) for idx, data_type in enumerate(self.data_types)
+            if data_type.conversion]
+        # Look up each output's conversion function once, not every packet
+        self._output_conversions = [
+            self.conversion_functions.get(data_type.conversion)
+            for __, data_type in self._output_data_types]
+        # Copied for each packet so the output is created at its final size
+        self._output_template = dict.fromkeys(
+            data_type.name for __, data_type in self._output_data_types)
+        self._uncertainty_cache = {}
+
     def __len__(self):
         return len(self.data_types)
 
@@ -208,23 +206,41 @@ class DataDecoder(brokkr.utils.misc.AutoReprMixin):
 
     def output_na_values(self):
         output_data = {data_type.name: self.output_na_value(data_type)
-                       for data_type in self.data_types
-                       if data_type.conversion}
+                       for __, data_type in self._output_data_types}
         return output_data
 
+    def get_uncertainty(self, data_type):
+        if data_type.uncertainty is not True:
+            return data_type.uncertainty
+
+        # Derived only from the data type object, so only calculate it once
+        try:
+            return self._uncertainty_cache[data_type]
+        except KeyError:
+            pass
+        uncertainty = abs(
+            self.conversion_functions[data_type.conversion](
+                1, **data_type.conversion_kwargs)
+            - self.conversion_functions[data_type.conversion](
+                0, **data_type.conversion_kwargs))
+        uncertainty = round(
+            uncertainty, -int(math.floor(math.log10(uncertainty))))
+        self._uncertainty_cache[data_type] = uncertainty
+        return uncertainty
+
     def convert_data(self, raw_data):
         error_count = 0
-        output_data = {}
-
-        for idx, data_type in enumerate(self.data_types):
-            if not data_type.conversion:
-                continue  # If this data value should be dropped, ignore it
-            value = raw_data
-            # Split input into items if each corresponds to one output
-            if (not self.include_all_data_each
-                    and isinstance(value, collections.abc.Sequence)
-                    and not isinstance(value, (bytes, bytearray, str))):
-                value = value[idx]
+        output_data = self._output_template.copy()
+
+        # Split input into items if each corresponds to one output
+        split_items = (
+            not self.include_all_data_each
+            and isinstance(raw_data, collections.abc.Sequence)
+            and not isinstance(raw_data, (bytes, bytearray, str)))
+
+        for (idx, data_type), conversion_function in zip(
+                self._output_data_types, self._output_conversions):
+            value = raw_data[idx] if split_items else raw_data
             if value is None:
                 LOGGER.debug("Data value is None decoding data_type %s to %s, "
                              "coercing to NA value %r",
@@ -233,9 +249,10 @@ class DataDecoder(brokkr.utils.misc.AutoReprMixin):
                 output_data[data_type.name] = self.output_na_value(data_type)
                 continue
             try:
-                output_value = (
-                    self.conversion_functions[data_type.conversion](
-                        value, **data_type.conversion_kwargs))
+                if conversion_function is None:
+                    raise KeyError(data_type.conversion)
+                output_value = conversion_function(
+                    value, **data_type.conversion_kwargs)
                 if data_type.digits is not None:
                     output_value = round(output_value, data_type.digits)
             # Handle errors decoding specific values
@@ -256,32 +273,24 @@ class DataDecoder(brokkr.utils.misc.AutoReprMixin):
                 output_data[data_type.name] = self.output_na_value(data_type)
                 error_count += 1
             else:
-                if data_type.uncertainty is True:
-                    uncertainty = abs(
-                        self.conversion_functions[data_type.conversion](
-                            1, **data_type.conversion_kwargs)
-                        - self.conversion_functions[data_type.conversion](
-                            0, **data_type.conversion_kwargs))
-                    uncertainty = round(
-                        uncertainty, -int(math.floor(math.log10(uncertainty))))
-
-                else:
-                    uncertainty = data_type.uncertainty
                 data_value = brokkr.pipeline.datavalue.DataValue(
                     output_value, data_type=data_type, raw_value=value,
-                    uncertainty=uncertainty)
+                    uncertainty=self.get_uncertainty(data_type))
                 output_data[data_type.name] = data_value
 
         if error_count > 1:
             LOGGER.warning("%s additional decode errors were suppressed.",
                            error_count - 1)
 
-        LOGGER.debug("Converted data: {%s}", brokkr.utils.output.format_data(
-            data=output_data,
-            seperator=", ",
-            include_raw=True,
-            item_limit=128,
-            ))
+        # Formatting every value is expensive, so only do it if it is logged
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(
+                "Converted data: {%s}", brokkr.utils.output.format_data(
+                    data=output_data,
+                    seperator=", ",
+                    include_raw=True,
+                    item_limit=128,
+                    ))
         return output_data
 
     def decode_data(self, data):
@@ -291,10 +300,12 @@ class DataDecoder(brokkr.utils.misc.AutoReprMixin):
                 LOGGER.debug("Data is None, passing through to pipeline")
             else:
                 output_data = self.output_na_values()
-                LOGGER.debug(
-                    "No data to decode, returning NAs: %r",
-                    brokkr.utils.output.format_data(
-                        data=output_data, seperator=", ", include_raw=False))
+                if LOGGER.isEnabledFor(logging.DEBUG):
+                    LOGGER.debug(
+                        "No data to decode, returning NAs: %r",
+                        brokkr.utils.output.format_data(
+                            data=output_data, seperator=", ",
+                            include_raw=False))
         else:
             output_data = self.convert_data(data)
         return output_data
@@ -312,11 +323,13 @@ class BinaryDataDecoder(DataDecoder):
             struct_format = byte_order + "".join(
                 [data_type.input_type for data_type in self.data_types])
         self.struct_format = struct_format
-        self.packet_size = struct.calcsize(self.struct_format)
+        # Compile the format once so each packet is unpacked in a single call
+        self._struct = struct.Struct(self.struct_format)
+        self.packet_size = self._struct.size
 
     def decode_binary(self, binary_data):
         try:
-            decoded_vals = struct.unpack(self.struct_format, binary_data)
+            decoded_vals = self._struct.unpack(binary_data)
         # Handle overall decoding errors
         except Exception as e:
             if binary_data is not None:
@@ -149,6 +149,11 @@ class LogHelper(brokkr.utils.misc.AutoReprMixin):
             self.logger.info("Error details:", exc_info=True)
             self.logger.info("Logger details: %r", self.logger)
             return
+        # Skip gathering the details entirely if they won't be logged
+        level_number = logging.getLevelName(str(level).upper())
+        if (isinstance(level_number, int)
+                and not self.logger.isEnabledFor(level_number)):
+            return
         if error is None:
             # Add stacklevel in Python 3.8
             logging_function("Error details:", exc_info=True)
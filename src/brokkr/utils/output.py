@@ -240,17 +240,21 @@ def render_output_filename(
     if not system_prefix:
         system_prefix = METADATA["name"]
 
+    # Get the current time once so all the time fields agree
+    utc_datetime = datetime.datetime.utcnow()
+    local_datetime = datetime.datetime.now()
+
     filename_kwargs_default = {
         "system_name": METADATA["name"],
         "system_prefix": system_prefix,
         "unit_number": UNIT_CONFIG["number"],
-        "utc_datetime": datetime.datetime.utcnow(),
-        "utc_date": datetime.datetime.utcnow().date(),
-        "utc_time": datetime.datetime.utcnow().time(),
-        "local_datetime": datetime.datetime.now(),
-        "local_date": datetime.datetime.now().date(),
-        "local_time": datetime.datetime.now().time(),
-        "current_ms": datetime.datetime.utcnow().microsecond // 1000,
+        "utc_datetime": utc_datetime,
+        "utc_date": utc_datetime.date(),
+        "utc_time": utc_datetime.time(),
+        "local_datetime": local_datetime,
+        "local_date": local_datetime.date(),
+        "local_time": local_datetime.time(),
+        "current_ms": utc_datetime.microsecond // 1000,
         "output_type": "data",
         "current_user": brokkr.utils.misc.get_actual_username(),
         }